@@ -2,38 +2,73 @@
 """
 Claude Helper — cross-platform system tray utility for Claude Code.
 
-Polls ~/.claude-helper/ for session state and pending permission requests.
+Watches ~/.claude-helper/ for session state and pending permission requests.
 Lets you respond to permission prompts (Allow/Deny) without switching
 to the terminal. Shows elicitation questions as notifications.
 
 Supports macOS (menu bar) and Windows (system tray).
 """
 
+import asyncio
+import functools
+import hashlib
 import json
+import logging
+import math
 import os
-import re
 import shutil
+import string
 import sys
+import tempfile
 import threading
 import time
 
-import psutil
 import pystray
-from PIL import Image, ImageChops, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # Without watchdog the app falls back to polling every POLL_INTERVAL
+    FileSystemEventHandler = object
+    Observer = None
 
 STATE_DIR = os.path.expanduser("~/.claude-helper")
 SESSIONS_DIR = os.path.join(STATE_DIR, "sessions")
 RESPONSES_DIR = os.path.join(STATE_DIR, "responses")
 
 CONFIG_FILE = os.path.join(STATE_DIR, "config.json")
-POLL_INTERVAL = 2  # seconds
+ICON_CACHE_DIR = os.path.join(STATE_DIR, "icon_cache")
+_ICON_CACHE_VERSION = 1  # bump when _generate_emoji_ring_icon's output changes
+POLL_INTERVAL = 2  # seconds, used when no filesystem watcher is available
+HOUSEKEEPING_INTERVAL = 10  # seconds between PID-liveness sweeps / full polls
+DEBOUNCE_INTERVAL = 0.1  # seconds to let a burst of file events settle
 STALE_THRESHOLD = 86400  # 24 hours
+PENDING_MTIME_SLACK = 2  # seconds; covers coarse (e.g. FAT) directory mtimes
+
+# Development aid: CLAUDE_HELPER_PROFILE=1 logs anything that blocks the
+# event loop for longer than SLOW_CALLBACK_THRESHOLD, times the poll path
+# and adds a menu item that writes the timings to PERF_LOG.
+PROFILE = os.environ.get("CLAUDE_HELPER_PROFILE") == "1"
+SLOW_CALLBACK_THRESHOLD = 0.02  # seconds
+PERF_LOG = os.path.join(STATE_DIR, "perf.log")
 
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
+_SAFE_ID_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
+_SAFE_ID_MAX_LEN = 128
 
 IS_MACOS = sys.platform == "darwin"
 IS_WINDOWS = sys.platform == "win32"
 
+# Icons are rendered at the tray's pixel size: the macOS menu bar is 22pt
+# (44px on Retina), Windows/Linux trays are at most 32px.
+TRAY_ICON_SIZE = 44 if IS_MACOS else 32
+
 # Status icon defaults and choices
 DEFAULT_STATUS_ICONS = {
     "working": "\u231b",       # ⌛
@@ -49,6 +84,7 @@ STATUS_ICON_OPTIONS = {
     "done": ["\U0001F7E1", "\u2705", "\U0001F7E2", "\U0001F389", "\U0001F44D", "\u2714\ufe0f"],
     "idle": ["\U0001F7E1", "\U0001F4A4", "\u23F8\ufe0f", "\U0001F7E2", "\U0001F311", "\u26AA"],
 }
+ATTENTION_RING_COLOR = (59, 130, 246, 255)  # blue
 STATUS_LABELS = {
     "working": "Working",
     "question": "Question",
@@ -56,32 +92,116 @@ STATUS_LABELS = {
     "done": "Done",
     "idle": "Idle",
 }
+# Menu order: sessions needing attention first, working sessions last
+_STATUS_PRIORITY = {"question": 0, "permission": 1, "done": 2, "idle": 2}
 
-# Auto-start constants (platform-specific)
+# Platform-specific imports and constants (auto-start, process checks)
 if IS_MACOS:
+    import plistlib
+    import subprocess
+
     LAUNCHD_LABEL = "com.claude-helper"
     PLIST_DEST = os.path.expanduser(f"~/Library/LaunchAgents/{LAUNCHD_LABEL}.plist")
 elif IS_WINDOWS:
+    import ctypes
+    import winreg
+
     AUTOSTART_REG_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
     AUTOSTART_REG_NAME = "ClaudeHelper"
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    _STILL_ACTIVE = 259
+
+
+def _json_loads(data):
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj, indent=False):
+    """Serialize obj to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+def _read_json_file(path):
+    """Parse a small JSON state file.
+
+    Unbuffered binary open: the whole file comes back from a single read()
+    with no BufferedReader or text decoder in between.
+    """
+    with open(path, "rb", buffering=0) as f:
+        return _json_loads(f.read())
+
+
+# Parsed config.json, keyed by the file's mtime so a read is a single stat().
+# The returned dict is shared — copy it before modifying.
+_cfg_cache = {"mtime": -1, "data": {}}
 
 
 def _read_config():
     try:
-        with open(CONFIG_FILE, "r") as f:
-            return json.load(f)
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        return {}
+    if st.st_mtime_ns == _cfg_cache["mtime"]:
+        return _cfg_cache["data"]
+    try:
+        data = _read_json_file(CONFIG_FILE)
     except (FileNotFoundError, json.JSONDecodeError, IOError):
         return {}
+    _cfg_cache.update(mtime=st.st_mtime_ns, data=data)
+    return data
+
+
+def _atomic_write_bytes(path, data, durable=False):
+    """Write bytes to path via a temp file and os.replace().
+
+    Readers see either the old file or the complete new one, never a partial
+    write. The temp file is unique (mkstemp, mode 0600), so concurrent
+    writers can't interleave. Pass durable=True to fsync before the rename;
+    short-lived response files only need atomicity, config should survive
+    a crash.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp",
+    )
+    try:
+        try:
+            os.write(fd, data)
+            if durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _atomic_write_json(path, data, indent=False, durable=False):
+    """Serialize data and write it with _atomic_write_bytes()."""
+    _atomic_write_bytes(path, _json_dumps(data, indent=indent), durable=durable)
 
 
 def _write_config(config):
     os.makedirs(STATE_DIR, mode=0o700, exist_ok=True)
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=2)
+    _atomic_write_json(CONFIG_FILE, config, indent=True, durable=True)
+    # Seed the cache with what we just wrote so the next read doesn't re-parse
+    try:
+        _cfg_cache.update(mtime=os.stat(CONFIG_FILE).st_mtime_ns, data=config)
+    except OSError:
+        _cfg_cache["mtime"] = -1
 
 
-def _generate_dot_image(color, filled, size=64):
-    """Generate a circle dot icon as a PIL Image."""
+@functools.lru_cache(maxsize=16)
+def _generate_dot_image(color, filled, size=TRAY_ICON_SIZE):
+    """Generate a circle dot icon as a PIL Image. Cached; do not mutate the result."""
     image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(image)
     margin = int(size * 0.15)
@@ -96,7 +216,7 @@ def _generate_dot_image(color, filled, size=64):
     return image
 
 
-def _generate_fill_frame(color, fill_level, size=64):
+def _generate_fill_frame(color, fill_level, size=TRAY_ICON_SIZE):
     """Generate a circle partially filled from the bottom.
 
     fill_level: 0.0 (outline only) to 1.0 (fully filled).
@@ -111,62 +231,64 @@ def _generate_fill_frame(color, fill_level, size=64):
         draw.ellipse(bbox, fill=color)
         return image
 
+    if fill_level > 0:
+        # The water line cuts the circle at sin(angle) = 1 - 2 * fill_level.
+        # Pillow measures angles clockwise from 3 o'clock, so the chord from
+        # start to 180 - start is the submerged bottom segment. Whole degrees
+        # are plenty at tray size and avoid chord artefacts some Pillow
+        # releases produce for fractional angles.
+        start = round(math.degrees(math.asin(1.0 - 2.0 * fill_level)))
+        draw.chord(bbox, start, 180 - start, fill=color)
+
     # Always draw outline
     draw.ellipse(bbox, outline=color, width=stroke_width)
-
-    if fill_level <= 0:
-        return image
-
-    # Filled circle on a separate layer
-    filled = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    ImageDraw.Draw(filled).ellipse(bbox, fill=color)
-
-    # Circle-shaped alpha mask
-    circle_mask = Image.new("L", (size, size), 0)
-    ImageDraw.Draw(circle_mask).ellipse(bbox, fill=255)
-
-    # Rectangle mask — everything below the water line
-    circle_h = size - 2 * margin
-    cutoff_y = margin + int(circle_h * (1.0 - fill_level))
-    rect_mask = Image.new("L", (size, size), 0)
-    ImageDraw.Draw(rect_mask).rectangle([0, cutoff_y, size, size], fill=255)
-
-    # Intersect the two masks
-    final_mask = ImageChops.multiply(circle_mask, rect_mask)
-
-    # Composite filled region onto the outline image
-    image = Image.composite(filled, image, final_mask)
     return image
 
 
 def _ensure_icons():
-    """Generate system tray icons. Returns (empty, filled, blue, green) PIL Images."""
+    """Generate the static tray icons. Returns (empty, filled) PIL Images."""
     empty = _generate_dot_image((180, 180, 180, 255), filled=False)
     filled = _generate_dot_image((180, 180, 180, 255), filled=True)
-    blue = _generate_dot_image((59, 130, 246, 255), filled=True)
-    green = _generate_dot_image((34, 197, 94, 255), filled=True)
-    return empty, filled, blue, green
+    return empty, filled
 
 
 _emoji_font_cache = {}
+# Icons are rendered on the startup prewarm thread and the poll worker;
+# this serializes font loading and disk cache writes between them.
+_icon_render_lock = threading.Lock()
 
 # Apple Color Emoji is a bitmap font with fixed valid sizes.
 # Other emoji fonts (e.g. Segoe UI Emoji on Windows) are scalable.
 _APPLE_EMOJI_SIZES = [20, 32, 40, 48, 64, 96, 160]
 
 
+def _emoji_font_paths():
+    """Candidate emoji font files for this platform, in preference order."""
+    if IS_MACOS:
+        return ["/System/Library/Fonts/Apple Color Emoji.ttc"]
+    if IS_WINDOWS:
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        return [os.path.join(windir, "Fonts", "seguiemj.ttf")]
+    return []
+
+
+@functools.lru_cache(maxsize=None)
+def _emoji_font_stamp():
+    """Identify the installed emoji font so an OS font update invalidates
+    icons cached on disk."""
+    for path in _emoji_font_paths():
+        try:
+            return f"{path}:{os.stat(path).st_mtime_ns}"
+        except OSError:
+            continue
+    return ""
+
+
 def _load_emoji_font(size):
     """Load an emoji-capable font at the given size. Cached by size."""
     if size in _emoji_font_cache:
         return _emoji_font_cache[size]
 
-    font_paths = []
-    if IS_MACOS:
-        font_paths.append("/System/Library/Fonts/Apple Color Emoji.ttc")
-    elif IS_WINDOWS:
-        windir = os.environ.get("WINDIR", r"C:\Windows")
-        font_paths.append(os.path.join(windir, "Fonts", "seguiemj.ttf"))
-
     # For bitmap fonts (Apple Color Emoji), snap to the nearest valid size
     sizes_to_try = [size]
     if IS_MACOS:
@@ -174,7 +296,7 @@ def _load_emoji_font(size):
         valid = [s for s in _APPLE_EMOJI_SIZES if s <= size]
         sizes_to_try = sorted(valid, reverse=True) if valid else _APPLE_EMOJI_SIZES[:1]
 
-    for path in font_paths:
+    for path in _emoji_font_paths():
         for sz in sizes_to_try:
             try:
                 font = ImageFont.truetype(path, sz)
@@ -187,7 +309,17 @@ def _load_emoji_font(size):
     return None
 
 
-def _generate_emoji_ring_icon(emoji_char, ring_color, size=64):
+@functools.lru_cache(maxsize=None)
+def _load_text_font(size):
+    """Pillow's bundled default font, for ASCII status symbols."""
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed-size bitmap default
+        return ImageFont.load_default()
+
+
+def _generate_emoji_ring_icon(emoji_char, ring_color, size=TRAY_ICON_SIZE):
     """Generate a ring icon with an emoji character centered inside."""
     image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(image)
@@ -200,8 +332,11 @@ def _generate_emoji_ring_icon(emoji_char, ring_color, size=64):
         outline=ring_color, width=stroke_width,
     )
 
-    # Try to render emoji in center
-    font = _load_emoji_font(int(size * 0.55))
+    # Try to render emoji in center. Plain ASCII symbols (a hand-configured
+    # "?" or "!") don't need the color emoji font at all.
+    plain = emoji_char.isascii()
+    font_size = int(size * 0.55)
+    font = _load_text_font(font_size) if plain else _load_emoji_font(font_size)
     if font:
         try:
             bbox = font.getbbox(emoji_char)
@@ -210,7 +345,10 @@ def _generate_emoji_ring_icon(emoji_char, ring_color, size=64):
             x = (size - tw) // 2 - bbox[0]
             y = (size - th) // 2 - bbox[1]
             try:
-                draw.text((x, y), emoji_char, font=font, embedded_color=True)
+                if plain:
+                    draw.text((x, y), emoji_char, font=font, fill=ring_color)
+                else:
+                    draw.text((x, y), emoji_char, font=font, embedded_color=True)
             except TypeError:
                 # Pillow < 8.0 doesn't support embedded_color
                 draw.text((x, y), emoji_char, font=font, fill=ring_color)
@@ -220,9 +358,47 @@ def _generate_emoji_ring_icon(emoji_char, ring_color, size=64):
     return image
 
 
+@functools.lru_cache(maxsize=64)
+def _render_emoji_ring(emoji_char, ring_color, size=TRAY_ICON_SIZE):
+    """Return an emoji ring icon, memoized in-process and on disk.
+
+    Rendered PNGs live in ICON_CACHE_DIR, so later launches skip the emoji
+    font load and glyph rasterization entirely. The returned image is
+    shared — do not mutate it.
+    """
+    with _icon_render_lock:
+        key = hashlib.sha1(
+            f"{_ICON_CACHE_VERSION}|{emoji_char}|{ring_color}|{size}|"
+            f"{sys.platform}|{_emoji_font_stamp()}".encode()
+        ).hexdigest()
+        path = os.path.join(ICON_CACHE_DIR, f"{key}.png")
+        try:
+            image = Image.open(path)
+            image.load()
+            return image
+        except OSError:
+            pass
+
+        image = _generate_emoji_ring_icon(emoji_char, ring_color, size)
+        # ASCII symbols are cheap to redraw; don't persist a bare ring
+        # rendered without an emoji font either
+        if not emoji_char.isascii() and _load_emoji_font(int(size * 0.55)):
+            try:
+                os.makedirs(ICON_CACHE_DIR, mode=0o700, exist_ok=True)
+                # Tiny icons: favour encode speed over compression ratio
+                image.save(path, "PNG", compress_level=1)
+            except OSError:
+                pass
+        return image
+
+
 def _is_safe_id(value):
     """Check that a value is safe to use as a path component (no traversal)."""
-    return bool(value) and bool(_SAFE_ID.match(value))
+    return (
+        isinstance(value, str)
+        and 0 < len(value) <= _SAFE_ID_MAX_LEN
+        and _SAFE_ID_CHARS.issuperset(value)
+    )
 
 
 def _rmtree(path):
@@ -236,47 +412,236 @@ def _rmtree(path):
         pass
 
 
+def _load_json_cached(entry, cache, seen):
+    """Parse the JSON file behind a DirEntry, reusing the cached result while
+    its stat is unchanged.
+
+    cache maps path → ((ino, mtime_ns, size), data); the path is added to
+    seen. The inode catches a file atomically replaced within the same
+    mtime tick with an equal size (always 0 in DirEntry.stat() on Windows).
+    """
+    path = entry.path
+    st = entry.stat(follow_symlinks=False)
+    seen.add(path)
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    data = _read_json_file(path)
+    cache[path] = (key, data)
+    return data
+
+
+def _evict_unseen(cache, seen):
+    """Drop cache entries for files that were not present in the last scan."""
+    for path in [p for p in cache if p not in seen]:
+        del cache[path]
+
+
+_perf_stats = {}  # qualname → [calls, total_ns, max_ns]
+
+
+def _timed(func):
+    """Accumulate call count and wall time for func when PROFILE is set.
+
+    Without PROFILE the function is returned as is, so there is no cost.
+    """
+    if not PROFILE:
+        return func
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            stats = _perf_stats.setdefault(name, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+    return wrapper
+
+
+@functools.lru_cache(maxsize=None)
+def _get_psutil():
+    """Import psutil on first use; it is only needed for liveness checks."""
+    import psutil
+    return psutil
+
+
 def _pid_alive(pid):
-    """Check if a process with the given PID is still running."""
+    """Check if a process with the given PID is still running.
+
+    Uses a single kill(pid, 0) on POSIX and OpenProcess on Windows, falling
+    back to psutil only when the cheap check is inconclusive.
+    """
     try:
-        return psutil.pid_exists(int(pid))
+        pid = int(pid)
     except (ValueError, TypeError):
         return False
+    if pid <= 0:
+        return False
+    if IS_WINDOWS:
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if handle:
+            try:
+                exit_code = ctypes.c_ulong()
+                if kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                    return exit_code.value == _STILL_ACTIVE
+            finally:
+                kernel32.CloseHandle(handle)
+    else:
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # Exists but belongs to another user
+            return True
+        except OSError:
+            pass
+    return _get_psutil().pid_exists(pid)
+
+
+def _snapshot_alive_pids():
+    """Return the set of running PIDs, taken in one pass, or None.
+
+    On Linux this is a single listing of /proc; elsewhere psutil enumerates
+    the process table once. Lets a poll check many PIDs without a syscall
+    each. None means no snapshot could be taken; callers then fall back to
+    per-PID _pid_alive checks via _PidAliveMemo.
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            with os.scandir("/proc") as it:
+                return frozenset(int(e.name) for e in it if e.name.isdigit())
+        return frozenset(_get_psutil().pids())
+    except Exception:
+        return None
+
+
+class _PidAliveMemo(dict):
+    """Stand-in for a PID snapshot when none could be taken.
+
+    `pid in memo` runs _pid_alive once per PID and remembers the answer, so
+    a session and its pending requests sharing a PID cost one probe. Lives
+    for a single poll.
+    """
+
+    def __contains__(self, pid):
+        if not dict.__contains__(self, pid):
+            self[pid] = _pid_alive(pid)
+        return self[pid]
+
+
+def _pid_in(pid, alive_pids):
+    """Check a PID from a state file against a snapshot or _PidAliveMemo."""
+    try:
+        return int(pid) in alive_pids
+    except (ValueError, TypeError):
+        return False
+
+
+# _update_icon target meaning "run the working animation"
+_ANIMATE = object()
+
+
+class _SessionsEventHandler(FileSystemEventHandler):
+    """Forwards any change under SESSIONS_DIR to the poll worker."""
+
+    def __init__(self, notify):
+        super().__init__()
+        self._notify = notify
+
+    def on_created(self, event):
+        self._notify()
+
+    def on_modified(self, event):
+        self._notify()
+
+    def on_deleted(self, event):
+        self._notify()
+
+    def on_moved(self, event):
+        self._notify()
 
 
 class ClaudeHelperApp:
     def __init__(self):
-        self.icon_empty, self.icon_filled, self.icon_blue, self.icon_green = _ensure_icons()
+        self.icon_empty, self.icon_filled = _ensure_icons()
         self.sessions = {}
         self.pending_requests = {}
+        self._session_cache = {}  # info.json path → (stat key, data)
+        self._pending_cache = {}  # pending file path → (stat key, data)
+        self._pending_dir_cache = {}  # pending dir path → (mtime_ns, requests, file paths)
         self._running = True
-        self._lock = threading.Lock()
-        self._icon_cache = {}  # (emoji, ring_color) → PIL Image
+        self._loop = None
+        self._poll_event = None  # asyncio.Event, created on the loop in _main()
+        self._observer = None
+        self._last_menu_key = None  # _menu_state_key() of the current menu
+        self._answers_state = {}  # elicitation request id → {question index: label}
+        self._answers_lock = threading.Lock()
 
         # Animation frames for "working" state (gray fill/unfill cycle)
         self._anim_frames = self._generate_animation_frames()
         self._anim_index = 0
-        self._anim_active = False
+        self._anim_event = None  # asyncio.Event, set while the animation runs
+
+        # Font loading and glyph rasterization can take a while on a cold
+        # cache; do it in the background so the tray appears immediately.
+        threading.Thread(target=self._prewarm_emoji_icons, daemon=True).start()
 
-        # Build initial menu
-        menu = self._build_menu()
+        # The menu descriptor is created once and reads _menu_items on demand;
+        # _rebuild_menu swaps the items and asks pystray to refresh.
+        self._menu_items = self._build_menu_items()
         self.icon = pystray.Icon(
             "claude-helper",
             icon=self.icon_empty,
             title="Claude Helper",
-            menu=menu,
+            menu=pystray.Menu(lambda: self._menu_items),
         )
+        self._current_icon_obj = self.icon_empty  # image last handed to pystray
+        self._icon_target = self.icon_empty  # last icon/_ANIMATE chosen by a poll
 
         self._cleanup_stale_sessions()
 
     def run(self):
-        """Start the app. Runs polling and animation loops in background threads."""
-        poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
-        poll_thread.start()
-        anim_thread = threading.Thread(target=self._animation_loop, daemon=True)
-        anim_thread.start()
+        """Start the app.
+
+        The tray icon owns the main thread (required by macOS); polling and
+        animation run as coroutines on an asyncio loop in a background thread.
+        """
+        loop_thread = threading.Thread(target=asyncio.run, args=(self._main(),), daemon=True)
+        loop_thread.start()
         self.icon.run()
 
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        if PROFILE:
+            # asyncio's debug mode warns about every callback or coroutine
+            # step that holds the loop longer than slow_callback_duration.
+            logging.basicConfig(level=logging.WARNING)
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = SLOW_CALLBACK_THRESHOLD
+        self._poll_event = asyncio.Event()
+        self._anim_event = asyncio.Event()
+        self._start_observer()
+        await asyncio.gather(self._poll_loop(), self._animation_loop())
+
+    def _prewarm_emoji_icons(self):
+        """Render every attention icon up front so a new prompt never waits on PIL."""
+        configured = _read_config().get("status_icons", {})
+        for status in ("question", "permission"):
+            emojis = list(STATUS_ICON_OPTIONS[status])
+            if configured.get(status) and configured[status] not in emojis:
+                emojis.append(configured[status])
+            for emoji in emojis:
+                _render_emoji_ring(emoji, ATTENTION_RING_COLOR)
+
     def _generate_animation_frames(self, num_steps=10):
         """Pre-generate frames for the working-state fill animation."""
         color = (180, 180, 180, 255)  # gray
@@ -287,101 +652,247 @@ class ClaudeHelperApp:
         # Bounce back down: 9/10, 8/10, ..., 1/10 (skip endpoints)
         for i in range(num_steps - 1, 0, -1):
             frames.append(_generate_fill_frame(color, i / num_steps))
-        return frames
+        return tuple(frames)
 
-    def _animation_loop(self):
-        """Background loop that cycles animation frames when active."""
+    async def _animation_loop(self):
+        """Cycle animation frames while _anim_event is set; sleep otherwise."""
         while self._running:
-            if self._anim_active:
+            await self._anim_event.wait()
+            while self._anim_event.is_set() and self._running:
                 self._anim_index = (self._anim_index + 1) % len(self._anim_frames)
                 try:
-                    self.icon.icon = self._anim_frames[self._anim_index]
+                    self._set_icon(self._anim_frames[self._anim_index])
                 except Exception:
                     pass
-            time.sleep(0.2)
+                await asyncio.sleep(0.2)
+
+    def _on_loop(self, callback, *args):
+        """Run callback on the event loop thread, or inline before it starts."""
+        if self._loop is None:
+            callback(*args)
+            return
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def _show_static_icon(self, image):
+        """Stop the animation and show image. Runs on the loop thread, so no
+        animation frame can land after it."""
+        if self._anim_event is not None:
+            self._anim_event.clear()
+        self._set_icon(image)
+
+    def _set_icon(self, image):
+        """Hand image to pystray unless it is already showing.
+
+        Every assignment re-encodes the image for the platform (NSImage on
+        macOS, HICON on Windows), and most polls leave the icon unchanged.
+        """
+        if image is self._current_icon_obj:
+            return
+        self.icon.icon = image
+        self._current_icon_obj = image
+
+    def _start_animation(self):
+        """Start the working animation from its first frame if it isn't running."""
+        if self._anim_event is not None and not self._anim_event.is_set():
+            self._anim_index = 0
+            self._anim_event.set()
+
+    def _start_observer(self):
+        """Watch SESSIONS_DIR with the native backend (FSEvents, ReadDirectoryChangesW, inotify)."""
+        if Observer is None:
+            return
+        try:
+            # Watching needs the directory to exist; before the first session
+            # starts it may not, and we'd be stuck on the 2 s polling fallback.
+            os.makedirs(SESSIONS_DIR, mode=0o700, exist_ok=True)
+            observer = Observer()
+            observer.schedule(
+                _SessionsEventHandler(self._request_poll), SESSIONS_DIR, recursive=True,
+            )
+            observer.start()
+        except Exception:
+            return
+        self._observer = observer
+
+    def _request_poll(self):
+        """Ask the poll loop to refresh as soon as possible. Safe from any thread."""
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._poll_event.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    async def _poll_loop(self):
+        """Poll when files change, plus a housekeeping tick.
+
+        File events only refresh state. Checking PIDs for dead sessions and
+        orphaned requests runs at most every HOUSEKEEPING_INTERVAL, and that
+        tick doubles as the safety net should the watcher miss an event.
 
-    def _poll_loop(self):
-        """Background polling loop."""
+        The blocking disk work in _poll runs in the default executor so the
+        animation keeps ticking; polls never overlap, so no lock is needed.
+        """
+        loop = self._loop
+        next_housekeeping = 0
         while self._running:
+            housekeeping = loop.time() >= next_housekeeping
+            if housekeeping:
+                next_housekeeping = loop.time() + HOUSEKEEPING_INTERVAL
             try:
-                self._poll()
+                await loop.run_in_executor(None, self._poll, housekeeping)
             except Exception:
                 pass
-            time.sleep(POLL_INTERVAL)
-
-    def _poll(self):
-        with self._lock:
-            self._read_sessions()
-            self._cleanup_dead_sessions()
-            self._read_pending_requests()
-            self._cleanup_stale_pending()
-            self._update_icon()
-            self._rebuild_menu()
-
-    def _read_sessions(self):
-        self.sessions = {}
-        if not os.path.isdir(SESSIONS_DIR):
-            return
-        for session_id in os.listdir(SESSIONS_DIR):
-            if not _is_safe_id(session_id):
-                continue
-            info_file = os.path.join(SESSIONS_DIR, session_id, "info.json")
-            if not os.path.isfile(info_file):
-                continue
+            timeout = next_housekeeping - loop.time()
+            if not self._observer:
+                timeout = min(timeout, POLL_INTERVAL)
             try:
-                with open(info_file, "r") as f:
-                    self.sessions[session_id] = json.load(f)
-            except (json.JSONDecodeError, IOError):
+                await asyncio.wait_for(self._poll_event.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
                 continue
-
-    def _cleanup_dead_sessions(self):
+            # Coalesce a burst of events (e.g. a hook rewriting info.json) into one poll
+            await asyncio.sleep(DEBOUNCE_INTERVAL)
+            self._poll_event.clear()
+
+    @_timed
+    def _poll(self, housekeeping=True):
+        # Build the new state in locals and publish it with one assignment,
+        # so nothing ever sees sessions that the sweeps are about to drop.
+        sessions, pending_requests = self._scan_state()
+        alive_pids = None
+        if housekeeping:
+            # One process-table snapshot serves every liveness check this tick
+            alive_pids = _snapshot_alive_pids()
+            if alive_pids is None:
+                alive_pids = _PidAliveMemo()
+            self._cleanup_dead_sessions(sessions, alive_pids)
+        self._cleanup_stale_pending(sessions, pending_requests, alive_pids)
+        self.sessions, self.pending_requests = sessions, pending_requests
+        self._prune_answers_state()
+        self._update_icon()
+        self._rebuild_menu()
+
+    @_timed
+    def _cleanup_dead_sessions(self, sessions, alive_pids):
         """Remove sessions whose parent Claude Code process is no longer running."""
         dead = []
-        for session_id, data in self.sessions.items():
+        for session_id, data in sessions.items():
             pid = data.get("parent_pid")
             if pid is None:
                 dead.append(session_id)
-            elif not _pid_alive(pid):
+            elif not _pid_in(pid, alive_pids):
                 dead.append(session_id)
         for session_id in dead:
-            del self.sessions[session_id]
+            del sessions[session_id]
             _rmtree(os.path.join(SESSIONS_DIR, session_id))
 
-    def _read_pending_requests(self):
-        self.pending_requests = {}
-        if not os.path.isdir(SESSIONS_DIR):
-            return
-        for session_id in os.listdir(SESSIONS_DIR):
-            if not _is_safe_id(session_id):
-                continue
-            pending_dir = os.path.join(SESSIONS_DIR, session_id, "pending")
-            if not os.path.isdir(pending_dir):
+    @_timed
+    def _scan_state(self):
+        """Read all session info and pending requests in a single scandir pass.
+
+        DirEntry type checks reuse the directory listing, so each session
+        costs one listing plus a stat per file instead of repeated
+        isdir/isfile/listdir calls. Returns (sessions, pending_requests).
+        """
+        sessions = {}
+        pending_requests = {}
+        seen = set()
+        try:
+            with os.scandir(SESSIONS_DIR) as it:
+                session_entries = [
+                    e for e in it
+                    if e.is_dir(follow_symlinks=False) and _is_safe_id(e.name)
+                ]
+        except OSError:
+            session_entries = []
+
+        for entry in session_entries:
+            session_id = entry.name
+            try:
+                with os.scandir(entry.path) as it:
+                    for sub in it:
+                        if sub.name == "info.json" and sub.is_file(follow_symlinks=False):
+                            try:
+                                sessions[session_id] = _load_json_cached(
+                                    sub, self._session_cache, seen,
+                                )
+                            except (json.JSONDecodeError, IOError):
+                                continue
+                        elif sub.name == "pending" and sub.is_dir(follow_symlinks=False):
+                            self._scan_pending(session_id, sub, pending_requests, seen)
+            except OSError:
                 continue
-            for filename in os.listdir(pending_dir):
-                if not filename.endswith(".json"):
+
+        _evict_unseen(self._session_cache, seen)
+        _evict_unseen(self._pending_cache, seen)
+        _evict_unseen(self._pending_dir_cache, seen)
+        return sessions, pending_requests
+
+    def _scan_pending(self, session_id, pending_entry, pending_requests, seen):
+        """Add the requests in one session's pending/ directory to pending_requests.
+
+        Hooks only ever write pending files by create-and-rename
+        (write_json_atomic) or delete them, and both update the directory's
+        mtime; while it is unchanged the previous listing is reused without
+        touching the files. An in-place rewrite would break this. A listing is
+        only memoized when every file parsed and the mtime is older than
+        PENDING_MTIME_SLACK: a hook may still be writing a file it has just
+        created, and coarse mtimes can hide a change made within the same
+        tick.
+        """
+        dir_path = pending_entry.path
+        dir_mtime = pending_entry.stat(follow_symlinks=False).st_mtime_ns
+        seen.add(dir_path)
+        cached = self._pending_dir_cache.get(dir_path)
+        if cached and cached[0] == dir_mtime:
+            pending_requests.update(cached[1])
+            seen.update(cached[2])
+            return
+
+        requests = {}
+        paths = []
+        complete = True
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if not entry.name.endswith(".json") or not entry.is_file(follow_symlinks=False):
                     continue
-                filepath = os.path.join(pending_dir, filename)
                 try:
-                    with open(filepath, "r") as f:
-                        data = json.load(f)
-                    request_id = data.get("id", filename[:-5])
-                    if not _is_safe_id(request_id):
-                        continue
-                    data["_session_id"] = session_id
-                    self.pending_requests[request_id] = data
+                    data = _load_json_cached(entry, self._pending_cache, seen)
                 except (json.JSONDecodeError, IOError):
+                    complete = False
+                    continue
+                paths.append(entry.path)
+                request_id = data.get("id", entry.name[:-5])
+                if not _is_safe_id(request_id):
                     continue
+                # The menu only shows the hook's description; don't keep the
+                # raw tool input (e.g. a whole file for Write) in the cache
+                data.pop("tool_input", None)
+                data["_session_id"] = session_id
+                requests[request_id] = data
+        pending_requests.update(requests)
+        if complete and time.time_ns() - dir_mtime > PENDING_MTIME_SLACK * 1_000_000_000:
+            self._pending_dir_cache[dir_path] = (dir_mtime, requests, tuple(paths))
+        else:
+            self._pending_dir_cache.pop(dir_path, None)
+
+    @_timed
+    def _cleanup_stale_pending(self, sessions, pending_requests, alive_pids):
+        """Housekeeping: remove orphaned pending files. Does not affect display.
 
-    def _cleanup_stale_pending(self):
-        """Housekeeping: remove orphaned pending files. Does not affect display."""
+        alive_pids is None on polls that skip PID checks.
+        """
         stale_ids = []
-        for request_id, req in self.pending_requests.items():
+        for request_id, req in pending_requests.items():
             pid = req.get("pid")
             sid = req.get("session_id", req.get("_session_id", ""))
-            session = self.sessions.get(sid, {})
+            session = sessions.get(sid, {})
             session_status = session.get("status")
             # Hook process died without cleaning up its file
-            if pid and not _pid_alive(pid):
+            if pid and alive_pids is not None and not _pid_in(pid, alive_pids):
                 stale_ids.append(request_id)
             # Session has moved past this request
             elif req.get("type") == "elicitation" and session_status != "question":
@@ -392,7 +903,7 @@ class ClaudeHelperApp:
             elif not session:
                 stale_ids.append(request_id)
         for request_id in stale_ids:
-            req = self.pending_requests.pop(request_id, None)
+            req = pending_requests.pop(request_id, None)
             if req:
                 sid = req.get("_session_id", "")
                 if not _is_safe_id(sid) or not _is_safe_id(request_id):
@@ -403,6 +914,7 @@ class ClaudeHelperApp:
                 except FileNotFoundError:
                     pass
 
+    @_timed
     def _update_icon(self):
         """Update tray icon based on aggregate session status.
 
@@ -414,40 +926,60 @@ class ClaudeHelperApp:
         Icon is driven ONLY by info.json status — pending files never
         influence icon state (they are sub-menu content only).
         """
-        # Find the highest-priority notable status
+        # Find the highest-priority notable status (one pass over sessions)
+        statuses = {s.get("status") for s in self.sessions.values()}
         for status in ("question", "permission", "done", "idle"):
-            if any(s.get("status") == status for s in self.sessions.values()):
-                self._anim_active = False
+            if status in statuses:
                 if status in ("question", "permission"):
-                    emoji = self._get_status_icon(status)
-                    ring_color = (59, 130, 246, 255)   # blue
-                    cache_key = (emoji, ring_color)
-                    if cache_key not in self._icon_cache:
-                        self._icon_cache[cache_key] = _generate_emoji_ring_icon(
-                            emoji, ring_color,
-                        )
-                    self.icon.icon = self._icon_cache[cache_key]
+                    icons = _read_config().get("status_icons", {})
+                    emoji = self._get_status_icon(status, icons)
+                    image = _render_emoji_ring(emoji, ATTENTION_RING_COLOR)
                 else:
                     # done/idle → filled dot (user should go check)
-                    self.icon.icon = self.icon_filled
-                return
-
-        # Sessions exist but all are "working" → animated gray fill/unfill
-        if self.sessions:
-            if not self._anim_active:
-                self._anim_index = 0
-                self._anim_active = True
-            return
+                    image = self.icon_filled
+                break
+        else:
+            # Sessions exist but all are "working" → animated gray fill/unfill
+            image = _ANIMATE if self.sessions else self.icon_empty
 
-        self._anim_active = False
-        self.icon.icon = self.icon_empty
+        # Most polls land on the same icon; don't wake the loop for those
+        if image is self._icon_target:
+            return
+        self._icon_target = image
+        if image is _ANIMATE:
+            self._on_loop(self._start_animation)
+        else:
+            self._on_loop(self._show_static_icon, image)
 
+    @_timed
     def _rebuild_menu(self):
-        """Rebuild the tray menu with current session state."""
-        self.icon.menu = self._build_menu()
+        """Rebuild the tray menu, skipping the rebuild if nothing it shows changed."""
+        state_key = self._menu_state_key()
+        if state_key == self._last_menu_key:
+            return
+        self._last_menu_key = state_key
+        self._menu_items = self._build_menu_items()
+        self.icon.update_menu()
+
+    def _menu_state_key(self):
+        """Everything _build_menu_items depends on, except the auto-start state.
 
-    def _build_menu(self):
-        """Build the pystray menu from current state."""
+        Auto-start only changes through _toggle_autostart, which resets
+        _last_menu_key itself.
+        """
+        _read_config()  # refresh _cfg_cache so its mtime reflects the file
+        sessions = tuple(sorted(
+            (sid, s.get("status"), s.get("project_name"), s.get("cwd"))
+            for sid, s in self.sessions.items()
+        ))
+        return sessions, tuple(sorted(self.pending_requests)), _cfg_cache["mtime"]
+
+    @_timed
+    def _build_menu_items(self):
+        """Build the top-level pystray menu items from current state."""
+        config = _read_config()
+        icons = config.get("status_icons", {})
+        elicitation_mode = config.get("elicitation_mode", "terminal")
         items = []
 
         if not self.sessions:
@@ -455,54 +987,59 @@ class ClaudeHelperApp:
         else:
             sorted_sessions = sorted(
                 self.sessions.items(),
-                key=lambda x: (
-                    0 if x[1].get("status") == "question" else
-                    1 if x[1].get("status") == "permission" else
-                    2 if x[1].get("status") in ("done", "idle") else 3
-                ),
+                key=lambda x: _STATUS_PRIORITY.get(x[1].get("status"), 3),
             )
+            # Bucket requests by session once instead of filtering per session
+            pending_by_session = {}
+            for request_id, request in self.pending_requests.items():
+                sid = request.get("session_id", request.get("_session_id"))
+                pending_by_session.setdefault(sid, {})[request_id] = request
             for session_id, session in sorted_sessions:
-                items.append(self._build_session_menu(session_id, session))
+                items.append(self._build_session_menu(
+                    session_id, session, pending_by_session.get(session_id, {}),
+                    icons, elicitation_mode,
+                ))
 
         items.append(pystray.Menu.SEPARATOR)
 
         # Elicitation mode toggle
-        elicitation_mode = _read_config().get("elicitation_mode", "terminal")
         elicitation_label = f"Questions: {'Tray' if elicitation_mode == 'menubar' else 'Terminal'}"
         items.append(pystray.MenuItem(elicitation_label, self._toggle_elicitation_mode))
 
         # Status icons submenu
-        items.append(self._build_status_icons_menu())
+        items.append(self._build_status_icons_menu(icons))
 
         # Auto-start toggle
         autostart_label = f"Auto-start: {'On' if self._is_autostart_enabled() else 'Off'}"
         items.append(pystray.MenuItem(autostart_label, self._toggle_autostart))
 
+        if PROFILE:
+            items.append(pystray.MenuItem("Write Perf Stats", self._write_perf_stats))
+
         items.append(pystray.MenuItem("Quit", self._quit))
 
-        return pystray.Menu(*items)
+        return tuple(items)
 
-    def _get_status_icon(self, status):
-        """Get the configured emoji for a session status."""
-        config = _read_config()
-        icons = config.get("status_icons", {})
+    def _get_status_icon(self, status, icons):
+        """Get the configured emoji for a session status.
+
+        icons is the "status_icons" mapping from config.json.
+        """
         return icons.get(status, DEFAULT_STATUS_ICONS.get(status, "\u2753"))
 
-    def _build_session_menu(self, session_id, session):
-        """Build a submenu for a single session."""
+    def _build_session_menu(self, session_id, session, session_requests, icons, elicitation_mode):
+        """Build a submenu for a single session.
+
+        session_requests maps request id → pending request for this session.
+        """
         project = session.get("project_name", "unknown")
         status = session.get("status", "unknown")
 
-        # Collect pending requests for this session
-        session_requests = {
-            rid: req for rid, req in self.pending_requests.items()
-            if req.get("session_id", req.get("_session_id")) == session_id
-        }
         elicitations = {rid: r for rid, r in session_requests.items() if r.get("type") == "elicitation"}
         permissions = {rid: r for rid, r in session_requests.items() if r.get("type") != "elicitation"}
 
         # Session label — driven by info.json status only
-        icon = self._get_status_icon(status)
+        icon = self._get_status_icon(status, icons)
         if status == "question":
             label = f"{icon} {project} \u2014 question"
         elif status == "permission":
@@ -515,7 +1052,6 @@ class ClaudeHelperApp:
         sub_items = []
 
         # Elicitation questions
-        elicitation_mode = _read_config().get("elicitation_mode", "terminal")
         for request_id, request in elicitations.items():
             for q in request.get("questions", []):
                 q_text = q.get("question", "Question")
@@ -572,9 +1108,8 @@ class ClaudeHelperApp:
         response_file = os.path.join(RESPONSES_DIR, f"{request_id}.json")
         response = {"id": request_id, "decision": decision, "timestamp": time.time()}
         try:
-            with open(response_file, "w") as f:
-                json.dump(response, f)
-        except IOError as e:
+            _atomic_write_json(response_file, response)
+        except OSError as e:
             try:
                 self.icon.notify(f"Failed to write decision: {e}", "Claude Helper")
             except Exception:
@@ -590,34 +1125,41 @@ class ClaudeHelperApp:
             return
         os.makedirs(RESPONSES_DIR, mode=0o700, exist_ok=True)
         response_file = os.path.join(RESPONSES_DIR, f"{request_id}.json")
-        answers = {}
-        if os.path.isfile(response_file):
-            try:
-                with open(response_file, "r") as f:
-                    answers = json.load(f).get("answers", {})
-            except (json.JSONDecodeError, IOError):
-                pass
-        answers[str(question_index)] = selected_label
-        response = {"id": request_id, "answers": answers, "timestamp": time.time()}
-        try:
-            with open(response_file, "w") as f:
-                json.dump(response, f)
-        except IOError as e:
+        with self._answers_lock:
+            answers = self._answers_state.get(request_id)
+            if answers is None:
+                # First answer this run — pick up anything written before a restart
+                answers = {}
+                try:
+                    answers = _read_json_file(response_file).get("answers", {})
+                except (FileNotFoundError, json.JSONDecodeError, IOError):
+                    pass
+                self._answers_state[request_id] = answers
+            answers[str(question_index)] = selected_label
+            response = {"id": request_id, "answers": answers, "timestamp": time.time()}
             try:
-                self.icon.notify(f"Failed to write answer: {e}", "Claude Helper")
-            except Exception:
-                pass
+                _atomic_write_json(response_file, response)
+            except OSError as e:
+                try:
+                    self.icon.notify(f"Failed to write answer: {e}", "Claude Helper")
+                except Exception:
+                    pass
+
+    def _prune_answers_state(self):
+        """Forget in-memory answers for questions that are no longer pending."""
+        with self._answers_lock:
+            for request_id in [r for r in self._answers_state if r not in self.pending_requests]:
+                del self._answers_state[request_id]
 
     def _toggle_elicitation_mode(self, icon, item):
-        config = _read_config()
+        config = dict(_read_config())
         current = config.get("elicitation_mode", "terminal")
         config["elicitation_mode"] = "terminal" if current == "menubar" else "menubar"
         _write_config(config)
+        self._request_poll()
 
-    def _build_status_icons_menu(self):
+    def _build_status_icons_menu(self, current_icons):
         """Build the 'Status Icons' settings submenu."""
-        config = _read_config()
-        current_icons = config.get("status_icons", {})
         state_items = []
         for status in ("working", "question", "permission", "done", "idle"):
             current = current_icons.get(status, DEFAULT_STATUS_ICONS[status])
@@ -636,11 +1178,12 @@ class ClaudeHelperApp:
 
     def _make_icon_callback(self, status, emoji):
         def callback(icon, item):
-            config = _read_config()
-            icons = config.get("status_icons", {})
+            config = dict(_read_config())
+            icons = dict(config.get("status_icons", {}))
             icons[status] = emoji
             config["status_icons"] = icons
             _write_config(config)
+            self._request_poll()
         return callback
 
     def _toggle_autostart(self, icon, item):
@@ -648,6 +1191,8 @@ class ClaudeHelperApp:
             self._disable_autostart()
         else:
             self._enable_autostart()
+        self._last_menu_key = None
+        self._request_poll()
 
     def _is_autostart_enabled(self):
         if IS_MACOS:
@@ -674,7 +1219,6 @@ class ClaudeHelperApp:
         if not os.path.isfile(PLIST_DEST):
             return False
         try:
-            import plistlib
             with open(PLIST_DEST, "rb") as f:
                 plist = plistlib.load(f)
             return plist.get("RunAtLoad", False)
@@ -683,8 +1227,6 @@ class ClaudeHelperApp:
 
     def _enable_autostart_macos(self):
         try:
-            import plistlib
-            import subprocess
             app_path = os.path.dirname(os.path.abspath(__file__))
             venv_python = os.path.join(STATE_DIR, "venv", "bin", "python")
             python_path = venv_python if os.path.isfile(venv_python) else sys.executable
@@ -697,8 +1239,7 @@ class ClaudeHelperApp:
                 "StandardErrorPath": os.path.join(STATE_DIR, "claude-helper.err"),
             }
             os.makedirs(os.path.dirname(PLIST_DEST), exist_ok=True)
-            with open(PLIST_DEST, "wb") as f:
-                plistlib.dump(plist, f)
+            _atomic_write_bytes(PLIST_DEST, plistlib.dumps(plist), durable=True)
             subprocess.run(["launchctl", "load", PLIST_DEST], check=False)
         except Exception as e:
             try:
@@ -708,7 +1249,6 @@ class ClaudeHelperApp:
 
     def _disable_autostart_macos(self):
         try:
-            import subprocess
             if os.path.isfile(PLIST_DEST):
                 subprocess.run(["launchctl", "unload", PLIST_DEST], check=False)
                 os.unlink(PLIST_DEST)
@@ -722,7 +1262,6 @@ class ClaudeHelperApp:
 
     def _is_autostart_enabled_windows(self):
         try:
-            import winreg
             key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, AUTOSTART_REG_KEY, 0, winreg.KEY_READ)
             try:
                 winreg.QueryValueEx(key, AUTOSTART_REG_NAME)
@@ -736,7 +1275,6 @@ class ClaudeHelperApp:
 
     def _enable_autostart_windows(self):
         try:
-            import winreg
             app_path = os.path.abspath(__file__)
             venv_python = os.path.join(STATE_DIR, "venv", "Scripts", "python.exe")
             python_path = venv_python if os.path.isfile(venv_python) else sys.executable
@@ -754,7 +1292,6 @@ class ClaudeHelperApp:
 
     def _disable_autostart_windows(self):
         try:
-            import winreg
             key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, AUTOSTART_REG_KEY, 0, winreg.KEY_SET_VALUE)
             try:
                 winreg.DeleteValue(key, AUTOSTART_REG_NAME)
@@ -769,28 +1306,48 @@ class ClaudeHelperApp:
                 pass
 
     def _cleanup_stale_sessions(self):
-        if not os.path.isdir(SESSIONS_DIR):
+        try:
+            with os.scandir(SESSIONS_DIR) as it:
+                entries = list(it)
+        except OSError:
             return
         now = time.time()
-        for session_id in os.listdir(SESSIONS_DIR):
-            session_path = os.path.join(SESSIONS_DIR, session_id)
-            if not _is_safe_id(session_id) or os.path.islink(session_path):
+        for entry in entries:
+            session_path = entry.path
+            if not _is_safe_id(entry.name) or entry.is_symlink():
                 _rmtree(session_path)
                 continue
-            info_file = os.path.join(session_path, "info.json")
-            if not os.path.isfile(info_file):
+            # Missing, unreadable or corrupt info.json all mean the session is gone
+            try:
+                data = _read_json_file(os.path.join(session_path, "info.json"))
+            except (json.JSONDecodeError, OSError):
                 _rmtree(session_path)
                 continue
-            try:
-                with open(info_file, "r") as f:
-                    data = json.load(f)
-                if now - data.get("last_updated", 0) > STALE_THRESHOLD:
-                    _rmtree(session_path)
-            except (json.JSONDecodeError, IOError):
+            if now - data.get("last_updated", 0) > STALE_THRESHOLD:
                 _rmtree(session_path)
 
+    def _write_perf_stats(self, icon, item):
+        """Append the accumulated _timed counters to PERF_LOG."""
+        lines = [time.strftime("%Y-%m-%d %H:%M:%S")]
+        for name, (calls, total_ns, max_ns) in sorted(_perf_stats.items()):
+            lines.append(
+                f"  {name}: {calls} calls, avg {total_ns / calls / 1e6:.3f} ms, "
+                f"max {max_ns / 1e6:.3f} ms"
+            )
+        try:
+            with open(PERF_LOG, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            try:
+                self.icon.notify(f"Failed to write perf stats: {e}", "Claude Helper")
+            except Exception:
+                pass
+
     def _quit(self, icon, item):
         self._running = False
+        if self._observer:
+            self._observer.stop()
+        self._request_poll()
         icon.stop()
 
 
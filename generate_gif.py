@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """Generate an animated GIF demonstrating the circle fill/unfill animation."""
 
-from PIL import Image, ImageDraw, ImageChops
+import math
+
+from PIL import Image, ImageDraw
+
 
 def _generate_fill_frame(color, fill_level, size=128):
     """Generate a circle partially filled from the bottom."""
@@ -15,24 +18,12 @@ def _generate_fill_frame(color, fill_level, size=128):
         draw.ellipse(bbox, fill=color)
         return image
 
-    draw.ellipse(bbox, outline=color, width=stroke_width)
-
-    if fill_level <= 0:
-        return image
-
-    filled = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    ImageDraw.Draw(filled).ellipse(bbox, fill=color)
-
-    circle_mask = Image.new("L", (size, size), 0)
-    ImageDraw.Draw(circle_mask).ellipse(bbox, fill=255)
+    if fill_level > 0:
+        # Same chord construction as claude_helper._generate_fill_frame
+        start = round(math.degrees(math.asin(1.0 - 2.0 * fill_level)))
+        draw.chord(bbox, start, 180 - start, fill=color)
 
-    circle_h = size - 2 * margin
-    cutoff_y = margin + int(circle_h * (1.0 - fill_level))
-    rect_mask = Image.new("L", (size, size), 0)
-    ImageDraw.Draw(rect_mask).rectangle([0, cutoff_y, size, size], fill=255)
-
-    final_mask = ImageChops.multiply(circle_mask, rect_mask)
-    image = Image.composite(filled, image, final_mask)
+    draw.ellipse(bbox, outline=color, width=stroke_width)
     return image
 
 
@@ -41,26 +32,29 @@ def main():
     num_steps = 20  # More steps for smoother GIF
     size = 128
 
-    frames = []
+    # Dark background for GIF compatibility, shared by every frame
+    bg = Image.new("RGBA", (size, size), (24, 24, 24, 255))
+
     # Fill up
+    frames = []
     for i in range(num_steps + 1):
         frame = _generate_fill_frame(color, i / num_steps, size=size)
-        # Convert RGBA to RGB with dark background for GIF compatibility
-        bg = Image.new("RGBA", (size, size), (24, 24, 24, 255))
-        composite = Image.alpha_composite(bg, frame)
-        frames.append(composite.convert("RGB"))
+        frames.append(Image.alpha_composite(bg, frame).convert("RGB"))
 
-    # Bounce back down (skip endpoints to avoid duplicate frames)
-    for i in range(num_steps - 1, 0, -1):
-        frame = _generate_fill_frame(color, i / num_steps, size=size)
-        bg = Image.new("RGBA", (size, size), (24, 24, 24, 255))
-        composite = Image.alpha_composite(bg, frame)
-        frames.append(composite.convert("RGB"))
+    # Bounce back down through the same fill levels (skip endpoints to
+    # avoid duplicate frames)
+    frames += frames[num_steps - 1:0:-1]
 
     output_path = "docs/working-animation.gif"
     import os
     os.makedirs("docs", exist_ok=True)
 
+    # The animation is one gray on a dark background plus anti-aliased edges,
+    # so a single 16-color palette taken from the half-full frame (which has
+    # every shade) is lossless, and the encoder needn't quantize each frame.
+    palette = frames[num_steps // 2].quantize(colors=16)
+    frames = [f.quantize(palette=palette, dither=Image.Dither.NONE) for f in frames]
+
     frames[0].save(
         output_path,
         save_all=True,
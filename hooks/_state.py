@@ -0,0 +1,159 @@
+"""Shared helpers for hooks that read and write the tray app's state files."""
+
+import json
+import os
+import sys
+import time
+
+STATE_DIR = os.path.expanduser("~/.claude-helper")
+SESSIONS_DIR = os.path.join(STATE_DIR, "sessions")
+RESPONSES_DIR = os.path.join(STATE_DIR, "responses")
+CONFIG_FILE = os.path.join(STATE_DIR, "config.json")
+
+_SAFE_ID_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
+)
+_SAFE_ID_MAX_LEN = 128
+
+# O_BINARY keeps Windows from translating line endings; O_CLOEXEC is POSIX-only
+_READ_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_CLOEXEC", 0)
+_READ_SIZE = 65536
+
+# Up to ~0.2 s of retries for os.replace() hitting an open file on Windows
+_REPLACE_ATTEMPTS = 10
+_REPLACE_RETRY_DELAY = 0.02
+
+_json_cache = {}  # path → ((ino, mtime_ns, size), data)
+
+
+def is_safe_id(value):
+    """Check that a value is safe to use as a path component (no traversal)."""
+    return (
+        isinstance(value, str)
+        and 0 < len(value) <= _SAFE_ID_MAX_LEN
+        and _SAFE_ID_CHARS.issuperset(value)
+    )
+
+
+def read_json(path):
+    """Parse a JSON file read with plain os.read() calls.
+
+    State files are a few hundred bytes, so this is usually one read with no
+    file object in between. A full chunk means there may be more to read.
+    """
+    fd = os.open(path, _READ_FLAGS)
+    try:
+        data = os.read(fd, _READ_SIZE)
+        if len(data) == _READ_SIZE:
+            chunks = [data]
+            while True:
+                chunk = os.read(fd, _READ_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b"".join(chunks)
+    finally:
+        os.close(fd)
+    return json.loads(data)
+
+
+def load_json_cached(path):
+    """Parse a JSON file, reusing the last result while its stat is unchanged.
+
+    The result is shared; copy it before modifying.
+    """
+    st = os.stat(path)
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _json_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    data = read_json(path)
+    _json_cache[path] = (key, data)
+    return data
+
+
+def write_json_atomic(path, data):
+    """Replace path with data serialized as compact JSON.
+
+    The tray app re-reads state files as soon as they change, so write a temp
+    file next to it and os.replace() it into place: readers see either the
+    old file or the new one, never a truncated one. The PID makes the temp
+    name unique among concurrently running hooks.
+
+    Files under a session's pending/ directory must only ever be written
+    through here (or removed): the tray reuses a pending/ listing while the
+    directory's mtime is unchanged, and a rename updates that mtime where
+    an in-place rewrite would not, leaving the tray showing stale requests.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        try:
+            os.write(fd, json.dumps(data).encode())
+        finally:
+            os.close(fd)
+        for attempt in range(_REPLACE_ATTEMPTS):
+            try:
+                os.replace(tmp_path, path)
+                break
+            except PermissionError:
+                # Windows refuses while another process (the tray re-reading
+                # it, or another hook) has the file open; that lasts only
+                # a moment, so retry briefly rather than lose the update
+                if sys.platform != "win32" or attempt == _REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(_REPLACE_RETRY_DELAY)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def detect_client(info_file):
+    """Detect whether the session runs in VS Code or a standalone terminal."""
+    try:
+        client = load_json_cached(info_file).get("client")
+        if client:
+            return client
+    except (json.JSONDecodeError, IOError):
+        pass
+    # Fallback: check environment variables
+    entrypoint = os.environ.get("CLAUDE_CODE_ENTRYPOINT", "")
+    if "vscode" in entrypoint or os.environ.get("VSCODE_PID"):
+        return "vscode"
+    return "terminal"
+
+
+def update_session_status(info_file, status, waiting_for=None):
+    """Set the session's status in info.json, skipping the write if unchanged."""
+    try:
+        # Usually just parsed by detect_client; re-read only if it changed since
+        info = dict(load_json_cached(info_file))
+        if info.get("status") == status and info.get("waiting_for") == waiting_for:
+            return
+        info["status"] = status
+        info["waiting_for"] = waiting_for
+        info["last_updated"] = int(time.time())
+        write_json_atomic(info_file, info)
+    except (json.JSONDecodeError, IOError):
+        pass
+
+
+def remove_files(*paths):
+    """Remove files that may already be gone."""
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def exit_on_signal(signum, frame):
+    """SIGTERM/SIGHUP handler for the blocking hooks.
+
+    Raising interrupts the wait at once; the caller's finally block then
+    removes its pending and response files.
+    """
+    sys.exit(1)
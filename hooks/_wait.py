@@ -0,0 +1,100 @@
+"""Shared helper for the blocking hooks: wait for a response file.
+
+The tray app writes responses into the responses directory with
+os.replace(), so the blocking hooks only need to know when that directory
+changes. Linux watches it with inotify and macOS with kqueue; anywhere
+else (Windows) falls back to polling, quickly at first and then backing
+off to every POLL_INTERVAL.
+"""
+
+import os
+import select
+import sys
+import time
+
+POLL_INTERVAL = 0.5  # seconds, only used without inotify/kqueue
+_FIRST_POLL = 0.025  # fallback delay doubles from here up to POLL_INTERVAL
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+
+
+def _inotify_watch(path):
+    """Return a non-blocking inotify fd watching path for finished writes."""
+    import ctypes
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    if libc.inotify_add_watch(fd, os.fsencode(path), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+        err = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(err, "inotify_add_watch failed")
+    return fd
+
+
+class DirWatcher:
+    """Wakes up when a file is written or renamed into a directory.
+
+    Create it before writing the pending request, so a response that lands
+    before the first wait() still counts. Usable as a context manager.
+    """
+
+    def __init__(self, path):
+        self._fd = None
+        self._kq = None
+        self._poller = None
+        self._delay = _FIRST_POLL
+        try:
+            if sys.platform.startswith("linux"):
+                self._fd = _inotify_watch(path)
+                # Registered once; unlike select() it has no FD_SETSIZE limit
+                self._poller = select.poll()
+                self._poller.register(self._fd, select.POLLIN)
+            elif hasattr(select, "kqueue"):
+                self._fd = os.open(path, os.O_RDONLY)
+                self._kq = select.kqueue()
+                self._kq.control([select.kevent(
+                    self._fd,
+                    filter=select.KQ_FILTER_VNODE,
+                    flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                    fflags=select.KQ_NOTE_WRITE,
+                )], 0)
+        except (OSError, AttributeError, ImportError):
+            # No usable watch (e.g. ctypes missing): poll instead
+            self.close()
+
+    def wait(self, timeout):
+        """Block until the directory changes or timeout seconds have passed."""
+        timeout = max(timeout, 0)
+        if self._kq is not None:
+            self._kq.control(None, 1, timeout)
+        elif self._poller is not None:
+            if self._poller.poll(timeout * 1000):
+                # Events are only a wakeup; the caller re-checks its file
+                try:
+                    while os.read(self._fd, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+        else:
+            # Answers usually come within seconds; don't make those wait a
+            # full interval, but stop waking up often once a request is old
+            time.sleep(min(self._delay, timeout))
+            self._delay = min(self._delay * 2, POLL_INTERVAL)
+
+    def close(self):
+        self._poller = None
+        if self._kq is not None:
+            self._kq.close()
+            self._kq = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -6,53 +6,43 @@ Non-blocking. Runs after user answers the question in the terminal.
 
 import json
 import os
-import re
 import sys
-import time
 
-STATE_DIR = os.path.expanduser("~/.claude-helper")
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
+from _state import SESSIONS_DIR, is_safe_id, read_json, update_session_status
 
 
 def main():
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, EOFError):
         sys.exit(0)
 
     session_id = input_data.get("session_id", "")
-    if not session_id or not _SAFE_ID.match(session_id):
+    if not is_safe_id(session_id):
         sys.exit(0)
 
-    pending_dir = os.path.join(STATE_DIR, "sessions", session_id, "pending")
-    info_file = os.path.join(STATE_DIR, "sessions", session_id, "info.json")
+    pending_dir = os.path.join(SESSIONS_DIR, session_id, "pending")
+    info_file = os.path.join(SESSIONS_DIR, session_id, "info.json")
 
     # Remove all elicitation pending files for this session
-    if os.path.isdir(pending_dir):
-        for filename in os.listdir(pending_dir):
-            if not filename.endswith(".json"):
-                continue
-            filepath = os.path.join(pending_dir, filename)
-            try:
-                with open(filepath, "r") as f:
-                    data = json.load(f)
-                if data.get("type") == "elicitation":
-                    os.unlink(filepath)
-            except (json.JSONDecodeError, IOError, OSError):
-                continue
-
-    # Reset session status back to working
-    if os.path.isfile(info_file):
+    try:
+        with os.scandir(pending_dir) as it:
+            entries = [
+                e for e in it
+                if e.name.endswith(".json") and e.is_file(follow_symlinks=False)
+            ]
+    except OSError:
+        entries = []
+    for entry in entries:
         try:
-            with open(info_file, "r") as f:
-                info = json.load(f)
-            info["status"] = "working"
-            info["waiting_for"] = None
-            info["last_updated"] = int(time.time())
-            with open(info_file, "w") as f:
-                json.dump(info, f, indent=4)
-        except (json.JSONDecodeError, IOError):
-            pass
+            data = read_json(entry.path)
+            if data.get("type") == "elicitation":
+                os.unlink(entry.path)
+        except (json.JSONDecodeError, IOError, OSError):
+            continue
+
+    # Reset session status back to working (no write if already reset)
+    update_session_status(info_file, "working")
 
 
 if __name__ == "__main__":
@@ -13,48 +13,30 @@ Can be overridden via elicitation_mode in ~/.claude-helper/config.json.
 
 import json
 import os
-import re
-import signal
 import sys
 import time
-import uuid
-
-STATE_DIR = os.path.expanduser("~/.claude-helper")
-CONFIG_FILE = os.path.join(STATE_DIR, "config.json")
-RESPONSES_DIR = os.path.join(STATE_DIR, "responses")
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
-POLL_INTERVAL = 0.5
-TIMEOUT = 300
 
+from _state import (
+    CONFIG_FILE, RESPONSES_DIR, SESSIONS_DIR, detect_client, exit_on_signal,
+    is_safe_id, load_json_cached, read_json, remove_files,
+    update_session_status, write_json_atomic,
+)
 
-def _detect_client(info_file):
-    """Detect whether running in VS Code or a standalone terminal."""
-    try:
-        with open(info_file, "r") as f:
-            client = json.load(f).get("client")
-            if client:
-                return client
-    except (FileNotFoundError, json.JSONDecodeError, IOError):
-        pass
-    entrypoint = os.environ.get("CLAUDE_CODE_ENTRYPOINT", "")
-    if "vscode" in entrypoint or os.environ.get("VSCODE_PID"):
-        return "vscode"
-    return "terminal"
+TIMEOUT = 300
 
 
 def _get_mode(info_file):
     """Determine elicitation mode. Config file overrides auto-detection."""
     # Explicit config override
     try:
-        with open(CONFIG_FILE, "r") as f:
-            mode = json.load(f).get("elicitation_mode")
-            if mode:
-                return mode
+        mode = load_json_cached(CONFIG_FILE).get("elicitation_mode")
+        if mode:
+            return mode
     except (FileNotFoundError, json.JSONDecodeError, IOError):
         pass
 
     # Auto-detect from session client type
-    client = _detect_client(info_file)
+    client = detect_client(info_file)
     # VS Code: show question in VS Code, tray just notifies
     # Terminal: show question in tray with answer options
     return "terminal" if client == "vscode" else "menubar"
@@ -67,42 +49,23 @@ def _build_question_data(questions):
             "index": i,
             "question": q.get("question", "Question"),
             "header": q.get("header", ""),
-            "options": [opt.get("label", str(opt)) for opt in q.get("options", [])],
+            # str(opt) is only a fallback; don't build it when there's a label
+            "options": [
+                opt["label"] if isinstance(opt, dict) and "label" in opt else str(opt)
+                for opt in q.get("options") or ()
+            ],
         })
     return data
 
 
-def _update_session_status(info_file, status, waiting_for):
-    if not os.path.isfile(info_file):
-        return
-    try:
-        with open(info_file, "r") as f:
-            info = json.load(f)
-        info["status"] = status
-        info["waiting_for"] = waiting_for
-        info["last_updated"] = int(time.time())
-        with open(info_file, "w") as f:
-            json.dump(info, f)
-    except (json.JSONDecodeError, IOError):
-        pass
-
-
-def _cleanup(*files):
-    for f in files:
-        try:
-            os.unlink(f)
-        except FileNotFoundError:
-            pass
-
-
 def main():
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, EOFError):
         sys.exit(0)
 
     session_id = input_data.get("session_id", "")
-    if not session_id or not _SAFE_ID.match(session_id):
+    if not is_safe_id(session_id):
         sys.exit(0)
 
     tool_name = input_data.get("tool_name", "")
@@ -113,20 +76,36 @@ def main():
     if not questions:
         sys.exit(0)
 
-    session_dir = os.path.join(STATE_DIR, "sessions", session_id)
+    session_dir = os.path.join(SESSIONS_DIR, session_id)
     pending_dir = os.path.join(session_dir, "pending")
-    if not os.path.isdir(session_dir):
+    try:
+        os.mkdir(pending_dir, 0o700)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        # Session not registered
         sys.exit(0)
 
-    os.makedirs(pending_dir, mode=0o700, exist_ok=True)
-
-    request_id = str(uuid.uuid4())
     question_data = _build_question_data(questions)
-    pending_file = os.path.join(pending_dir, f"{request_id}.json")
     info_file = os.path.join(session_dir, "info.json")
 
     mode = _get_mode(info_file)
 
+    if mode == "menubar":
+        # Blocking: this process owns its pending file and removes it on exit
+        request_id = os.urandom(12).hex()
+    else:
+        # Non-blocking: name the file after the questions, so asking the same
+        # thing again reuses the earlier notification instead of adding one.
+        # The tray keys all sessions' requests by id, so the session is
+        # hashed in too: another session asking the same thing stays separate.
+        import hashlib
+        request_id = hashlib.blake2b(
+            json.dumps([session_id, question_data], sort_keys=True).encode(),
+            digest_size=12,
+        ).hexdigest()
+    pending_file = os.path.join(pending_dir, f"{request_id}.json")
+
     if mode == "menubar":
         _run_menubar_mode(request_id, session_id, question_data, pending_file, info_file)
     else:
@@ -135,96 +114,103 @@ def main():
 
 def _run_terminal_mode(request_id, session_id, question_data, pending_file, info_file):
     """Non-blocking: write notification, allow tool through."""
-    request = {
-        "id": request_id,
-        "type": "elicitation",
-        "session_id": session_id,
-        "questions": question_data,
-        "timestamp": time.time(),
-    }
-    with open(pending_file, "w") as f:
-        json.dump(request, f)
-
-    _update_session_status(info_file, "question", "elicitation")
+    if not os.path.exists(pending_file):
+        request = {
+            "id": request_id,
+            "type": "elicitation",
+            "session_id": session_id,
+            "questions": question_data,
+            "timestamp": time.time(),
+        }
+        write_json_atomic(pending_file, request)
+
+    update_session_status(info_file, "question", "elicitation")
     sys.exit(0)
 
 
 def _run_menubar_mode(request_id, session_id, question_data, pending_file, info_file):
     """Blocking: write pending, poll for system tray answer, deny with context."""
+    # Only the blocking path needs these; keep them off the non-blocking exits
+    import signal
+
+    from _wait import POLL_INTERVAL, DirWatcher
+
     os.makedirs(RESPONSES_DIR, mode=0o700, exist_ok=True)
     response_file = os.path.join(RESPONSES_DIR, f"{request_id}.json")
 
-    def _handle_signal(signum, frame):
-        _cleanup(pending_file, response_file)
-        # Keep status as "question" — the question falls back to the terminal
-        # and is still pending. PostToolUse will reset when answered.
-        sys.exit(1)
-
-    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGTERM, exit_on_signal)
     if hasattr(signal, "SIGHUP"):
-        signal.signal(signal.SIGHUP, _handle_signal)
-
-    request = {
-        "id": request_id,
-        "type": "elicitation",
-        "session_id": session_id,
-        "pid": os.getpid(),
-        "questions": question_data,
-        "timestamp": time.time(),
-    }
-    with open(pending_file, "w") as f:
-        json.dump(request, f)
-
-    _update_session_status(info_file, "question", "elicitation")
-
-    # Print hint to terminal
-    print("\n  [Claude Helper] Question pending in system tray:", file=sys.stderr)
-    for q in question_data:
-        print(f"    {q['question']}", file=sys.stderr)
-        for i, opt in enumerate(q["options"], 1):
-            print(f"      {i}) {opt}", file=sys.stderr)
-    print("  Answer in system tray, or Ctrl+C to answer here.\n", file=sys.stderr)
-
-    start_time = time.time()
+        signal.signal(signal.SIGHUP, exit_on_signal)
+
+    # Watch for the answer before publishing the request, so it can't be missed
+    watcher = DirWatcher(RESPONSES_DIR)
+
     try:
-        while time.time() - start_time < TIMEOUT:
-            if os.path.isfile(response_file):
-                try:
-                    with open(response_file, "r") as f:
-                        response = json.load(f)
-                except (json.JSONDecodeError, IOError):
-                    time.sleep(POLL_INTERVAL)
-                    continue
-
-                _cleanup(pending_file, response_file)
-                _update_session_status(info_file, "working", None)
-
-                answers = response.get("answers", {})
-                lines = []
-                for idx_str, val in answers.items():
-                    idx = int(idx_str)
-                    if idx < len(question_data):
-                        lines.append(f"- {question_data[idx]['question']} -> {val}")
-                    else:
-                        lines.append(f"- Question {idx}: {val}")
-
-                context = "The user responded via Claude Helper system tray:\n" + "\n".join(lines)
-                output = {
-                    "hookSpecificOutput": {
-                        "hookEventName": "PreToolUse",
-                        "permissionDecision": "deny",
-                        "permissionDecisionReason": "User answered via Claude Helper system tray",
-                        "additionalContext": context,
-                    }
+        request = {
+            "id": request_id,
+            "type": "elicitation",
+            "session_id": session_id,
+            "pid": os.getpid(),
+            "questions": question_data,
+            "timestamp": time.time(),
+        }
+        write_json_atomic(pending_file, request)
+
+        update_session_status(info_file, "question", "elicitation")
+
+        # Print hint to terminal in one write rather than one per line
+        hint = ["\n  [Claude Helper] Question pending in system tray:"]
+        for q in question_data:
+            hint.append(f"    {q['question']}")
+            hint.extend(f"      {i}) {opt}" for i, opt in enumerate(q["options"], 1))
+        hint.append("  Answer in system tray, or Ctrl+C to answer here.\n\n")
+        sys.stderr.write("\n".join(hint))
+
+        deadline = time.monotonic() + TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = read_json(response_file)
+            except FileNotFoundError:
+                watcher.wait(remaining)
+                continue
+            except (json.JSONDecodeError, IOError):
+                # Caught a non-atomic writer mid-write. A directory watch
+                # may not fire again for it, so retry shortly.
+                watcher.wait(min(POLL_INTERVAL, remaining))
+                continue
+
+            remove_files(pending_file, response_file)
+            update_session_status(info_file, "working", None)
+
+            answers = response.get("answers", {})
+            lines = []
+            for idx_str, val in answers.items():
+                idx = int(idx_str)
+                if idx < len(question_data):
+                    lines.append(f"- {question_data[idx]['question']} -> {val}")
+                else:
+                    lines.append(f"- Question {idx}: {val}")
+
+            context = "The user responded via Claude Helper system tray:\n" + "\n".join(lines)
+            output = {
+                "hookSpecificOutput": {
+                    "hookEventName": "PreToolUse",
+                    "permissionDecision": "deny",
+                    "permissionDecisionReason": "User answered via Claude Helper system tray",
+                    "additionalContext": context,
                 }
-                print(json.dumps(output))
-                sys.exit(0)
+            }
+            print(json.dumps(output))
+            sys.exit(0)
 
-            time.sleep(POLL_INTERVAL)
     except KeyboardInterrupt:
         pass
     finally:
-        _cleanup(pending_file, response_file)
+        watcher.close()
+        remove_files(pending_file, response_file)
         # Keep status as "question" — the question falls back to the terminal
         # and is still pending. PostToolUse will reset when answered.
 
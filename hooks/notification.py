@@ -6,58 +6,42 @@ Non-blocking. Reads hook input from stdin.
 
 import json
 import os
-import re
 import sys
-import time
 
-STATE_DIR = os.path.expanduser("~/.claude-helper")
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
+from _state import SESSIONS_DIR, is_safe_id, update_session_status
+
+# (keyword in notification type/title, status, waiting_for), first match wins
+_KEYWORDS = (
+    ("permission", "permission", "permission"),
+    ("idle", "idle", "input"),
+    ("input", "idle", "input"),
+    ("elicitation", "idle", "elicitation"),
+)
 
 
 def main():
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, EOFError):
         sys.exit(0)
 
     session_id = input_data.get("session_id", "")
-    if not session_id or not _SAFE_ID.match(session_id):
-        sys.exit(0)
-
-    info_file = os.path.join(STATE_DIR, "sessions", session_id, "info.json")
-    if not os.path.isfile(info_file):
+    if not is_safe_id(session_id):
         sys.exit(0)
 
+    info_file = os.path.join(SESSIONS_DIR, session_id, "info.json")
     ntype = input_data.get("notification_type", "")
     title = input_data.get("title", "notification")
 
     # Determine waiting_for and status based on notification type or title
-    match = ntype or title
-    match_lower = match.lower()
-
-    if "permission" in match_lower:
-        waiting_for = "permission"
-        status = "permission"
-    elif "idle" in match_lower or "input" in match_lower:
-        waiting_for = "input"
-        status = "idle"
-    elif "elicitation" in match_lower:
-        waiting_for = "elicitation"
-        status = "idle"
+    match_lower = (ntype or title).lower()
+    for keyword, status, waiting_for in _KEYWORDS:
+        if keyword in match_lower:
+            break
     else:
-        waiting_for = title
-        status = "idle"
+        status, waiting_for = "idle", title
 
-    try:
-        with open(info_file, "r") as f:
-            info = json.load(f)
-        info["waiting_for"] = waiting_for
-        info["status"] = status
-        info["last_updated"] = int(time.time())
-        with open(info_file, "w") as f:
-            json.dump(info, f, indent=4)
-    except (json.JSONDecodeError, IOError):
-        pass
+    update_session_status(info_file, status, waiting_for)
 
 
 if __name__ == "__main__":
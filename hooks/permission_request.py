@@ -11,41 +11,44 @@ Behavior depends on the client type detected at session start:
 
 import json
 import os
-import re
-import signal
 import sys
 import time
-import uuid
 
-STATE_DIR = os.path.expanduser("~/.claude-helper")
-RESPONSES_DIR = os.path.join(STATE_DIR, "responses")
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
-POLL_INTERVAL = 0.5  # seconds
+from _state import (
+    RESPONSES_DIR, SESSIONS_DIR, detect_client, exit_on_signal, is_safe_id,
+    read_json, remove_files, update_session_status, write_json_atomic,
+)
+
 TIMEOUT = 300  # 5 minutes
 
+# Tools described by the file they touch
+_FILE_TOOLS = frozenset(("Edit", "Write", "Read"))
+
 
 def main():
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, EOFError):
         sys.exit(1)
 
     session_id = input_data.get("session_id", "")
-    if not session_id or not _SAFE_ID.match(session_id):
+    if not is_safe_id(session_id):
         sys.exit(1)
 
-    session_dir = os.path.join(STATE_DIR, "sessions", session_id)
+    session_dir = os.path.join(SESSIONS_DIR, session_id)
     pending_dir = os.path.join(session_dir, "pending")
 
-    if not os.path.isdir(session_dir):
+    try:
+        os.mkdir(pending_dir, 0o700)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
         # Session not registered — let terminal handle it
         sys.exit(1)
-
-    os.makedirs(pending_dir, mode=0o700, exist_ok=True)
     os.makedirs(RESPONSES_DIR, mode=0o700, exist_ok=True)
 
     # Generate a unique request ID
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(12).hex()
 
     # Extract permission request details
     tool_name = input_data.get("tool_name", "unknown")
@@ -56,15 +59,12 @@ def main():
     if tool_name == "AskUserQuestion":
         sys.exit(1)
 
-    # Build a human-readable description of the request
-    description = _describe_request(tool_name, tool_input)
-
     pending_file = os.path.join(pending_dir, f"{request_id}.json")
     response_file = os.path.join(RESPONSES_DIR, f"{request_id}.json")
     info_file = os.path.join(session_dir, "info.json")
 
     # Check client type from session info (fall back to env var detection)
-    client = _detect_client(info_file)
+    client = detect_client(info_file)
 
     # VS Code handles permissions natively — exit immediately.
     # Only set "permission" status for Bash (the main tool that shows a
@@ -73,90 +73,96 @@ def main():
     # completes, so the blue dot clears automatically.
     if client == "vscode":
         if tool_name == "Bash":
-            _update_session_status(info_file, "permission")
+            update_session_status(info_file, "permission")
         sys.exit(1)
 
     _run_terminal_mode(request_id, session_id, tool_name, tool_input,
-                       description, pending_file, response_file, info_file)
+                       pending_file, response_file, info_file)
 
 
 def _run_terminal_mode(request_id, session_id, tool_name, tool_input,
-                       description, pending_file, response_file, info_file):
+                       pending_file, response_file, info_file):
     """Blocking: poll for system tray response."""
-    # Register signal handlers so cleanup runs even on SIGTERM
-    def _handle_signal(signum, frame):
-        _cleanup(pending_file, response_file)
-        # Keep status as "permission" — the prompt falls back to the terminal
-        # and is still pending. PostToolUse will reset when resolved.
-        sys.exit(1)
-
-    signal.signal(signal.SIGTERM, _handle_signal)
-    if hasattr(signal, "SIGHUP"):
-        signal.signal(signal.SIGHUP, _handle_signal)
-
-    # Write pending request (include PID so system tray can detect stale requests)
-    request_data = {
-        "id": request_id,
-        "type": "permission",
-        "session_id": session_id,
-        "pid": os.getpid(),
-        "tool_name": tool_name,
-        "tool_input": tool_input,
-        "description": description,
-        "timestamp": time.time(),
-    }
+    # Only the blocking path needs these; keep them off the non-blocking exits
+    import signal
 
-    with open(pending_file, "w") as f:
-        json.dump(request_data, f)
+    from _wait import POLL_INTERVAL, DirWatcher
 
-    _update_session_status(info_file, "permission")
+    # Turn SIGTERM/SIGHUP into SystemExit so the finally block below cleans up
+    signal.signal(signal.SIGTERM, exit_on_signal)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, exit_on_signal)
 
-    # Poll for response
-    start_time = time.time()
+    # Watch for the decision before publishing the request, so it can't be missed
+    watcher = DirWatcher(RESPONSES_DIR)
 
     try:
-        while time.time() - start_time < TIMEOUT:
-            if os.path.isfile(response_file):
-                try:
-                    with open(response_file, "r") as f:
-                        response = json.load(f)
-                except (json.JSONDecodeError, IOError):
-                    time.sleep(POLL_INTERVAL)
-                    continue
-
-                # Clean up
-                _cleanup(pending_file, response_file)
-
-                # Restore session status
-                _update_session_status(info_file, "working")
-
-                # Output the decision in Claude Code's expected format
-                raw_decision = response.get("decision", "deny")
-                decision_map = {
-                    "allow": "allow",
-                    "always_allow": "allow",
-                    "deny": "deny",
-                }
-                behavior = decision_map.get(raw_decision, "deny")
-                decision_obj = {"behavior": behavior}
-                if behavior == "deny":
-                    decision_obj["message"] = "Denied via Claude Helper system tray"
-                output = {
-                    "hookSpecificOutput": {
-                        "hookEventName": "PermissionRequest",
-                        "decision": decision_obj,
-                    }
+        # Write pending request (include PID so system tray can detect stale requests)
+        request_data = {
+            "id": request_id,
+            "type": "permission",
+            "session_id": session_id,
+            "pid": os.getpid(),
+            "tool_name": tool_name,
+            "tool_input": tool_input,
+            # Only the tray shows this, so VS Code sessions never build it
+            "description": _describe_request(tool_name, tool_input),
+            "timestamp": time.time(),
+        }
+
+        write_json_atomic(pending_file, request_data)
+
+        update_session_status(info_file, "permission")
+
+        # Wait for response
+        deadline = time.monotonic() + TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = read_json(response_file)
+            except FileNotFoundError:
+                watcher.wait(remaining)
+                continue
+            except (json.JSONDecodeError, IOError):
+                # Caught a non-atomic writer mid-write. A directory watch
+                # may not fire again for it, so retry shortly.
+                watcher.wait(min(POLL_INTERVAL, remaining))
+                continue
+
+            # Clean up
+            remove_files(pending_file, response_file)
+
+            # Restore session status
+            update_session_status(info_file, "working")
+
+            # Output the decision in Claude Code's expected format
+            raw_decision = response.get("decision", "deny")
+            decision_map = {
+                "allow": "allow",
+                "always_allow": "allow",
+                "deny": "deny",
+            }
+            behavior = decision_map.get(raw_decision, "deny")
+            decision_obj = {"behavior": behavior}
+            if behavior == "deny":
+                decision_obj["message"] = "Denied via Claude Helper system tray"
+            output = {
+                "hookSpecificOutput": {
+                    "hookEventName": "PermissionRequest",
+                    "decision": decision_obj,
                 }
-                print(json.dumps(output))
-                sys.exit(0)
-
-            time.sleep(POLL_INTERVAL)
+            }
+            print(json.dumps(output))
+            sys.exit(0)
 
     except KeyboardInterrupt:
         pass
     finally:
+        watcher.close()
         # Clean up pending file on timeout or interruption
-        _cleanup(pending_file, response_file)
+        remove_files(pending_file, response_file)
         # Keep status as "permission" — the prompt falls back to the terminal
         # and is still pending. PostToolUse will reset when resolved.
 
@@ -164,69 +170,21 @@ def _run_terminal_mode(request_id, session_id, tool_name, tool_input,
     sys.exit(1)
 
 
-def _detect_client(info_file):
-    """Detect whether running in VS Code or a standalone terminal."""
-    try:
-        with open(info_file, "r") as f:
-            client = json.load(f).get("client")
-            if client:
-                return client
-    except (FileNotFoundError, json.JSONDecodeError, IOError):
-        pass
-    # Fallback: check environment variables
-    entrypoint = os.environ.get("CLAUDE_CODE_ENTRYPOINT", "")
-    if "vscode" in entrypoint or os.environ.get("VSCODE_PID"):
-        return "vscode"
-    return "terminal"
-
-
 def _describe_request(tool_name, tool_input):
     """Build a human-readable description of the permission request."""
     if tool_name == "Bash":
-        cmd = tool_input.get("command", "")
         desc = tool_input.get("description", "")
         if desc:
             return f"[Bash] {desc}"
         # Show first 80 chars of command
+        cmd = tool_input.get("command", "")
         if len(cmd) > 80:
             return f"[Bash] {cmd[:80]}..."
         return f"[Bash] {cmd}"
-    elif tool_name == "Edit":
-        path = tool_input.get("file_path", "unknown")
-        return f"[Edit] {os.path.basename(path)}"
-    elif tool_name == "Write":
+    if tool_name in _FILE_TOOLS:
         path = tool_input.get("file_path", "unknown")
-        return f"[Write] {os.path.basename(path)}"
-    elif tool_name == "Read":
-        path = tool_input.get("file_path", "unknown")
-        return f"[Read] {os.path.basename(path)}"
-    else:
-        return f"[{tool_name}]"
-
-
-def _cleanup(pending_file, response_file):
-    """Remove pending and response files."""
-    for f in (pending_file, response_file):
-        try:
-            os.unlink(f)
-        except FileNotFoundError:
-            pass
-
-
-def _update_session_status(info_file, status):
-    """Update session info status."""
-    if not os.path.isfile(info_file):
-        return
-    try:
-        with open(info_file, "r") as f:
-            info = json.load(f)
-        info["status"] = status
-        info["waiting_for"] = None
-        info["last_updated"] = int(time.time())
-        with open(info_file, "w") as f:
-            json.dump(info, f)
-    except (json.JSONDecodeError, IOError):
-        pass
+        return f"[{tool_name}] {os.path.basename(path)}"
+    return f"[{tool_name}]"
 
 
 if __name__ == "__main__":
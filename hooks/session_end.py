@@ -6,29 +6,58 @@ Non-blocking. Reads hook input from stdin.
 
 import json
 import os
-import re
-import shutil
+import stat
 import sys
 
-STATE_DIR = os.path.expanduser("~/.claude-helper")
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
+from _state import SESSIONS_DIR, is_safe_id
+
+
+def _rmtree(path):
+    """Remove a directory tree, ignoring errors. Never follows symlinks.
+
+    Session directories hold a few small files, so a plain scandir walk is
+    enough and saves importing shutil. DirEntry types come from the
+    directory listing, so no per-file stat is needed.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                _rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
 
 
 def main():
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, EOFError):
         sys.exit(0)
 
     session_id = input_data.get("session_id", "")
-    if not session_id or not _SAFE_ID.match(session_id):
+    if not is_safe_id(session_id):
         sys.exit(0)
 
-    session_dir = os.path.join(STATE_DIR, "sessions", session_id)
-    if os.path.islink(session_dir):
+    session_dir = os.path.join(SESSIONS_DIR, session_id)
+    try:
+        mode = os.lstat(session_dir).st_mode
+    except OSError:
+        sys.exit(0)
+    # One lstat answers both questions; never follow a symlink out of SESSIONS_DIR
+    if stat.S_ISLNK(mode):
         os.unlink(session_dir)
-    elif os.path.isdir(session_dir):
-        shutil.rmtree(session_dir, ignore_errors=True)
+    elif stat.S_ISDIR(mode):
+        _rmtree(session_dir)
 
 
 if __name__ == "__main__":
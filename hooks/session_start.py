@@ -6,28 +6,26 @@ Non-blocking. Reads hook input from stdin.
 
 import json
 import os
-import re
 import sys
 import time
 
-STATE_DIR = os.path.expanduser("~/.claude-helper")
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
+from _state import SESSIONS_DIR, is_safe_id, write_json_atomic
 
 
 def main():
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, EOFError):
         sys.exit(0)
 
     session_id = input_data.get("session_id", "")
-    if not session_id or not _SAFE_ID.match(session_id):
+    if not is_safe_id(session_id):
         sys.exit(0)
 
     cwd = input_data.get("cwd", "unknown")
     project_name = os.path.basename(cwd)
 
-    session_dir = os.path.join(STATE_DIR, "sessions", session_id)
+    session_dir = os.path.join(SESSIONS_DIR, session_id)
     os.makedirs(os.path.join(session_dir, "pending"), mode=0o700, exist_ok=True)
 
     parent_pid = os.getppid()
@@ -49,8 +47,7 @@ def main():
         "last_updated": int(time.time()),
     }
 
-    with open(os.path.join(session_dir, "info.json"), "w") as f:
-        json.dump(info, f, indent=4)
+    write_json_atomic(os.path.join(session_dir, "info.json"), info)
 
 
 if __name__ == "__main__":
@@ -6,38 +6,23 @@ Non-blocking (async). Reads hook input from stdin.
 
 import json
 import os
-import re
 import sys
-import time
 
-STATE_DIR = os.path.expanduser("~/.claude-helper")
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
+from _state import SESSIONS_DIR, is_safe_id, update_session_status
 
 
 def main():
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, EOFError):
         sys.exit(0)
 
     session_id = input_data.get("session_id", "")
-    if not session_id or not _SAFE_ID.match(session_id):
+    if not is_safe_id(session_id):
         sys.exit(0)
 
-    info_file = os.path.join(STATE_DIR, "sessions", session_id, "info.json")
-    if not os.path.isfile(info_file):
-        sys.exit(0)
-
-    try:
-        with open(info_file, "r") as f:
-            info = json.load(f)
-        info["status"] = "done"
-        info["waiting_for"] = "input"
-        info["last_updated"] = int(time.time())
-        with open(info_file, "w") as f:
-            json.dump(info, f, indent=4)
-    except (json.JSONDecodeError, IOError):
-        pass
+    info_file = os.path.join(SESSIONS_DIR, session_id, "info.json")
+    update_session_status(info_file, "done", "input")
 
 
 if __name__ == "__main__":
@@ -7,46 +7,62 @@ Non-blocking. Reads hook input from stdin.
 
 import json
 import os
-import re
 import sys
 import time
 
-STATE_DIR = os.path.expanduser("~/.claude-helper")
-_SAFE_ID = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
+from _state import SESSIONS_DIR, is_safe_id, write_json_atomic
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows
+
+
+def _reset_status(info_file, raw):
+    """Reset stale interactive status — if a tool is running, Claude is working."""
+    info = json.loads(raw)
+    if info.get("status") in ("question", "permission"):
+        info["status"] = "working"
+        info["waiting_for"] = None
+        info["last_updated"] = int(time.time())
+        write_json_atomic(info_file, info)
 
 
 def main():
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, EOFError):
         sys.exit(0)
 
     session_id = input_data.get("session_id", "")
-    if not session_id or not _SAFE_ID.match(session_id):
+    if not is_safe_id(session_id):
         sys.exit(0)
 
-    info_file = os.path.join(STATE_DIR, "sessions", session_id, "info.json")
-    if not os.path.isfile(info_file):
-        sys.exit(0)
+    info_file = os.path.join(SESSIONS_DIR, session_id, "info.json")
 
     try:
-        with open(info_file, "r") as f:
-            info = json.load(f)
+        with open(info_file, "rb", buffering=0) as f:
+            raw = f.read()
+            # This runs after every tool call and nearly always finds "working";
+            # only parse when one of the statuses we reset can be present.
+            if b'"question"' not in raw and b'"permission"' not in raw:
+                sys.exit(0)
+            if fcntl is not None:
+                # Parallel tool calls fire this hook together. The reset is
+                # the same whoever does it, so leave it to the lock holder.
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    sys.exit(0)
+                # POSIX can replace the file while it is open and locked
+                _reset_status(info_file, raw)
+                return
+        # Windows has no flock, and os.replace() fails while the target is
+        # open, so reset only after closing it; every hook does its own reset
+        _reset_status(info_file, raw)
     except (json.JSONDecodeError, IOError):
         sys.exit(0)
 
-    # Reset stale interactive status — if a tool is running, Claude is working.
-    current_status = info.get("status")
-    if current_status in ("question", "permission"):
-        info["status"] = "working"
-        info["waiting_for"] = None
-        info["last_updated"] = int(time.time())
-        try:
-            with open(info_file, "w") as f:
-                json.dump(info, f, indent=4)
-        except IOError:
-            pass
-
 
 if __name__ == "__main__":
     main()
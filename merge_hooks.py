@@ -15,8 +15,12 @@ def main():
     hooks_dir = sys.argv[2]
     venv_python = sys.argv[3]
 
+    # Hooks only use the standard library: -S skips site (and the venv's
+    # site-packages scan), -E ignores PYTHON* variables from the user's shell.
+    # Not -I: it also drops the script's directory from sys.path, which the
+    # hooks need for their shared _state/_wait modules.
     def cmd(script_name):
-        return '"' + venv_python + '" "' + os.path.join(hooks_dir, script_name) + '"'
+        return '"' + venv_python + '" -E -S "' + os.path.join(hooks_dir, script_name) + '"'
 
     hooks_config = {
         "SessionStart": [
@@ -90,10 +94,17 @@ def main():
 
     # Merge hooks (overwrite hook events, preserve other settings)
     existing_hooks = settings.get("hooks", {})
+    unchanged = "hooks" in settings and all(
+        existing_hooks.get(event) == entries for event, entries in hooks_config.items()
+    )
     existing_hooks.update(hooks_config)
     settings["hooks"] = existing_hooks
 
-    # Write back
+    # Write back, unless re-running setup changed nothing: editors and Claude
+    # Code watch settings.json and would reload it for no reason
+    if unchanged:
+        print("  + Hooks already up to date in " + settings_path)
+        return
     with open(settings_path, "w") as f:
         json.dump(settings, f, indent=2)
 
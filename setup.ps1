@@ -34,7 +34,7 @@ Invoke-Expression "$PythonExe -m venv `"$VenvDir`""
 & "$VenvDir\Scripts\python.exe" -m pip install --upgrade pip -q
 & "$VenvDir\Scripts\python.exe" -m pip install -r "$ScriptDir\requirements.txt" -q
 Write-Host "  + venv created at $VenvDir" -ForegroundColor Green
-Write-Host "  + dependencies installed (pystray, Pillow, psutil)" -ForegroundColor Green
+Write-Host "  + dependencies installed (pystray, Pillow, psutil, watchdog)" -ForegroundColor Green
 
 # 2. Create state directories
 Write-Host ""
@@ -18,7 +18,7 @@ python3 -m venv "$VENV_DIR"
 "$VENV_DIR/bin/pip" install --upgrade pip -q
 "$VENV_DIR/bin/pip" install -r "$SCRIPT_DIR/requirements.txt" -q
 echo "  + venv created at $VENV_DIR"
-echo "  + dependencies installed (pystray, Pillow, psutil)"
+echo "  + dependencies installed (pystray, Pillow, psutil, watchdog)"
 
 # 2. Create state directories
 echo ""